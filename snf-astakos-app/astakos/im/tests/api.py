@@ -24,11 +24,11 @@ from synnefo.lib import join_urls
 from django.core.urlresolvers import reverse
 
 from datetime import date
+from mock import patch
 
 #from xml.dom import minidom
 
 import json
-import time
 
 ROOT = "/%s/%s/%s/" % (
     astakos_settings.BASE_PATH, astakos_settings.ACCOUNTS_PREFIX, 'v1.0')
@@ -808,9 +808,10 @@ class ValidateAccessToken(TestCase):
             self.fail('Unexpected response content')
 
         # expired token
-        sleep_time = (self.token.expires_at - datetime.now()).total_seconds()
-        time.sleep(max(sleep_time, 0))
-        r = self.client.get(url)
+        with patch("astakos.oa2.backends.base.datetime") as mdatetime:
+            mdatetime.datetime.now.return_value = \
+                self.token.expires_at + timedelta(seconds=1)
+            r = self.client.get(url)
         self.assertEqual(r.status_code, 404)
         # assert expired token has been deleted
         self.assertEqual(self.oa2_backend.token_model.count(), 0)
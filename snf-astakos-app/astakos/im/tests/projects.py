@@ -33,9 +33,9 @@ def get_pending_apps(user):
 
 
 class ProjectAPITest(TransactionTestCase):
-    fixtures = ["test_projectlock.json"]
 
     def setUp(self):
+        ProjectLock.objects.get_or_create(pk=1)
         self.client = Client()
         with transaction.atomic():
             component1 = Component.objects.create(name="comp1")
@@ -828,9 +828,8 @@ class TestProjects(TransactionTestCase):
     Test projects.
     """
 
-    fixtures = ["test_projectlock.json"]
-
     def setUp(self):
+        ProjectLock.objects.get_or_create(pk=1)
         # astakos resources
         self.resource = Resource.objects.create(name="astakos.pending_app",
                                                 uplimit=0,
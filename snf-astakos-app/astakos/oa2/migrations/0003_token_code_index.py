@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oa2', '0002_auto_now_add'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='authorizationcode',
+            name='code',
+            field=models.TextField(db_index=True),
+            preserve_default=True,
+        ),
+        migrations.AlterField(
+            model_name='token',
+            name='code',
+            field=models.TextField(db_index=True),
+            preserve_default=True,
+        ),
+    ]
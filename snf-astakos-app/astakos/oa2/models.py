@@ -81,7 +81,7 @@ class Client(models.Model):
 
 class AuthorizationCode(models.Model):
     user = models.ForeignKey('im.AstakosUser', on_delete=models.PROTECT)
-    code = models.TextField()
+    code = models.TextField(db_index=True)
     redirect_uri = models.TextField(null=True, default=None)
     client = models.ForeignKey('oa2.Client', on_delete=models.PROTECT)
     scope = models.TextField(null=True, default=None)
@@ -110,7 +110,7 @@ class AuthorizationCode(models.Model):
 
 
 class Token(models.Model):
-    code = models.TextField()
+    code = models.TextField(db_index=True)
     created_at = models.DateTimeField(default=datetime.datetime.now)
     expires_at = models.DateTimeField()
     token_type = models.CharField(max_length=100, choices=TOKEN_TYPES,
@@ -192,21 +192,19 @@ class TestOA2(TestCase, URLAssertionsMixin):
         self.assertTrue('expires_in' in data)
         expires_in = data['expires_in']
 
-        try:
-            token = Token.objects.get(code=access_token)
-            self.assertEqual(token.expires_at,
-                             token.created_at +
-                             datetime.timedelta(seconds=expires_in))
-            self.assertEqual(token.token_type, token_type)
-            self.assertEqual(token.grant_type, 'authorization_code')
-            #self.assertEqual(token.user, expected.get('user'))
-            self.assertEqual(smart_str(token.redirect_uri),
-                             smart_str(expected.get('redirect_uri')))
-            self.assertEqual(smart_str(token.scope),
-                             smart_str(expected.get('scope')))
-            self.assertEqual(token.state, expected.get('state'))
-        except Token.DoesNotExist:
-            self.fail("Invalid access_token")
+        token = Token.objects.filter(code=access_token).first()
+        self.assertIsNotNone(token, "Invalid access_token")
+        self.assertEqual(token.expires_at,
+                         token.created_at +
+                         datetime.timedelta(seconds=expires_in))
+        self.assertEqual(token.token_type, token_type)
+        self.assertEqual(token.grant_type, 'authorization_code')
+        #self.assertEqual(token.user, expected.get('user'))
+        self.assertEqual(smart_str(token.redirect_uri),
+                         smart_str(expected.get('redirect_uri')))
+        self.assertEqual(smart_str(token.scope),
+                         smart_str(expected.get('scope')))
+        self.assertEqual(token.state, expected.get('state'))
 
     def setUp(self):
         baseurl = reverse('oauth2_authenticate').replace('/auth', '/')
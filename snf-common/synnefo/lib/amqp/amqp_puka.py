@@ -134,6 +134,9 @@ class AMQPPukaClient(object):
         self.client.sd.setsockopt(socket.SOL_TCP, socket.TCP_KEEPINTVL, 2)
         # Keepalive retry
         self.client.sd.setsockopt(socket.SOL_TCP, socket.TCP_KEEPCNT, 10)
+        # Disable Nagle's algorithm, so that small publishes are not delayed
+        # waiting for the ACK of the previous segment
+        self.client.sd.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
 
         self.log.info('Creating channel')
 
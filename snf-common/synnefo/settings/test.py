@@ -32,6 +32,8 @@ SNF_TEST_PITHOS_UPDATE_MD5 = bool(int(os.environ.get(
     'SNF_TEST_PITHOS_UPDATE_MD5', False)))
 SNF_TEST_PITHOS_SQLITE_MODULE = bool(int(os.environ.get(
     'SNF_TEST_PITHOS_SQLITE_MODULE', False)))
+SNF_TEST_SQLITE_IN_MEMORY = bool(int(os.environ.get(
+    'SNF_TEST_SQLITE_IN_MEMORY', False)))
 PASSWORD_HASHERS = (
     os.environ.get('SNF_TEST_PASSWORD_HASHERS',
                    'django.contrib.auth.hashers.MD5PasswordHasher'),
@@ -58,6 +60,11 @@ elif SNF_TEST_PITHOS_SQLITE_MODULE:
     PITHOS_BACKEND_POOL_ENABLED = False
     PITHOS_BACKEND_DB_MODULE = 'pithos.backends.lib.sqlite'
 
+# Create the SQLite test database in memory instead of a file under /tmp,
+# saving the file I/O of creating and flushing the tables on each run
+if not SNF_TEST_USE_POSTGRES and SNF_TEST_SQLITE_IN_MEMORY:
+    DATABASES['default']['TEST']['NAME'] = ':memory:'
+
 if SNF_TEST_PITHOS_UPDATE_MD5:
     PITHOS_UPDATE_MD5 = True
 else:
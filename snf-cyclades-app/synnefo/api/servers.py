@@ -693,7 +693,7 @@ def demux_server_action(request, server_id):
     if not isinstance(action, basestring):
         raise faults.BadRequest("Malformed Request. Invalid action.")
 
-    if key_to_action(action) not in [x[0] for x in VirtualMachine.ACTIONS]:
+    if key_to_action(action) not in VirtualMachine.ACTION_NAMES:
         if action not in ARBITRARY_ACTIONS:
             raise faults.BadRequest("Action %s not supported" % action)
     action_args = utils.get_attribute(req, action, required=False,
@@ -787,8 +787,8 @@ def update_metadata(request, server_id):
     metadata = utils.get_attribute(req, "metadata", required=True,
                                    attr_type=dict)
 
-    if len(metadata) + len(vm.metadata.all()) - \
-       len(vm.metadata.all().filter(meta_key__in=metadata.keys())) > \
+    if len(metadata) + vm.metadata.count() - \
+       vm.metadata.filter(meta_key__in=metadata.keys()).count() > \
        settings.CYCLADES_VM_MAX_METADATA:
         raise faults.BadRequest("Virtual Machines cannot have more than %s "
                                 "metadata items" %
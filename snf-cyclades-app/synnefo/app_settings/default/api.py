@@ -119,6 +119,13 @@ MAX_PERSONALITY_SIZE = 10240
 # Authentication URL of the astakos instance to be used for user management
 ASTAKOS_AUTH_URL = 'https://accounts.example.synnefo.org/identity/v2.0'
 
+# Number of seconds to cache the user information that Astakos returns for an
+# authentication token, in order to avoid contacting Astakos on each request.
+# The cache entry never outlives the token. A token that is revoked in Astakos
+# remains usable in Cyclades for at most this many seconds. Set to 0 to
+# disable caching.
+ASTAKOS_AUTH_CACHE_TIMEOUT = 0
+
 # Tune the size of the Astakos http client connection pool
 # This limit the number of concurrent requests to Astakos.
 CYCLADES_ASTAKOSCLIENT_POOLSIZE = 50
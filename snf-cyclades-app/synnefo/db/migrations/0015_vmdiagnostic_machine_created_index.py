@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('db', '0014_vm_rescue_properties'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='virtualmachinediagnostic',
+            index_together=set([('machine', 'created')]),
+        ),
+    ]
@@ -207,19 +207,10 @@ class Backend(models.Model):
         self.password_hash = encrypt_db_charfield(value)
 
     def save(self, *args, **kwargs):
-        # Create a new hash each time a Backend is saved
-        old_hash = self.hash
-        self.hash = self.create_hash()
-        super(Backend, self).save(*args, **kwargs)
-        if self.hash != old_hash:
-            # Populate the new hash to the new instances
-            self.virtual_machines.filter(deleted=False)\
-                                 .update(backend_hash=self.hash)
-
-    def __init__(self, *args, **kwargs):
-        super(Backend, self).__init__(*args, **kwargs)
         if not self.pk:
-            # Generate a unique index for the Backend
+            # Generate a unique index for the Backend. This is done on save
+            # and not in __init__, so that Backend objects that are never
+            # stored in the DB do not cost a query.
             indexes = list(Backend.objects.all().values_list('index',
                                                              flat=True))
             try:
@@ -227,6 +218,14 @@ class Backend(models.Model):
                 self.index = first_free
             except IndexError:
                 raise Exception("Cannot create more than 16 backends")
+        # Create a new hash each time a Backend is saved
+        old_hash = self.hash
+        self.hash = self.create_hash()
+        super(Backend, self).save(*args, **kwargs)
+        if self.hash != old_hash:
+            # Populate the new hash to the new instances
+            self.virtual_machines.filter(deleted=False)\
+                                 .update(backend_hash=self.hash)
 
     def use_hotplug(self):
         return self.hypervisor == "kvm" and snf_settings.GANETI_USE_HOTPLUG
@@ -248,6 +247,7 @@ BACKEND_STATUSES = (
     ('success', 'request completed successfully'),
     ('error', 'request returned error')
 )
+BACKEND_STATUS_NAMES = frozenset(x[0] for x in BACKEND_STATUSES)
 
 
 class QuotaHolderSerial(models.Model):
@@ -293,6 +293,7 @@ class VirtualMachine(models.Model):
         ('RESCUE', 'Rescue VM'),
         ('UNRESCUE', 'Unrescue VM'),
     )
+    ACTION_NAMES = frozenset(x[0] for x in ACTIONS)
 
     # The internal operating state of a VM
     OPER_STATES = (
@@ -434,7 +435,7 @@ class VirtualMachine(models.Model):
 
     def get_last_diagnostic(self, **filters):
         try:
-            return self.diagnostics.filter()[0]
+            return self.diagnostics.filter(**filters)[0]
         except IndexError:
             return None
 
@@ -985,6 +986,7 @@ class NetworkInterface(models.Model):
         ('DISABLED', 'Disabled'),
         ('PROTECTED', 'Protected')
     )
+    FIREWALL_PROFILE_NAMES = frozenset(x[0] for x in FIREWALL_PROFILES)
 
     STATES = (
         ("ACTIVE", "Active"),
@@ -1156,7 +1158,8 @@ class VirtualMachineDiagnosticManager(models.Manager):
         self.create_for_vm(vm, 'DEBUG', **kwargs)
 
     def since(self, vm, created_since, **kwargs):
-        return self.get_queryset().filter(vm=vm, created__gt=created_since,
+        return self.get_queryset().filter(machine=vm,
+                                          created__gt=created_since,
                                           **kwargs)
 
 
@@ -1186,6 +1189,9 @@ class VirtualMachineDiagnostic(models.Model):
 
     class Meta:
         ordering = ['-created']
+        # Diagnostics are always looked up per VM and ordered by creation
+        # time, e.g. to get the latest diagnostic of a VM
+        index_together = [["machine", "created"]]
 
 
 class Volume(models.Model):
@@ -20,6 +20,7 @@
 from django.test import TestCase, TransactionTestCase
 from django.db import transaction as django_transaction
 from django.conf import settings
+from django.utils import timezone
 
 # Import pool tests
 from synnefo.db.pools.tests import *
@@ -33,6 +34,8 @@ from django.db import IntegrityError
 from django.core.exceptions import MultipleObjectsReturned
 from snf_django.utils.testing import override_settings
 from mock import patch
+# Imported after the star imports, which would otherwise shadow it
+from datetime import timedelta
 
 
 class FlavorTest(TestCase):
@@ -133,6 +136,14 @@ class BackendTest(TestCase):
             self.assertEqual(kvm_backend.get_create_params(), {"hvparams": {}})
 
 
+def create_diagnostic(vm, created, **kwargs):
+    diag = VirtualMachineDiagnostic.objects.create(machine=vm, **kwargs)
+    # 'created' is set on creation, so backdate it afterwards
+    VirtualMachineDiagnostic.objects.filter(id=diag.id)\
+                                    .update(created=created)
+    return diag
+
+
 class VirtualMachineTest(TestCase):
     def setUp(self):
         self.vm = mfact.VirtualMachineFactory()
@@ -160,6 +171,39 @@ class VirtualMachineTest(TestCase):
         self.assertEqual(vm.rescue_image, None)
         self.assertEqual(vm.operstate, 'BUILD')
 
+    def test_get_last_diagnostic(self):
+        self.assertEqual(self.vm.get_last_diagnostic(), None)
+        now = timezone.now()
+        for age, level, source in [(2, "ERROR", "src1"), (1, "DEBUG", "src2")]:
+            create_diagnostic(self.vm, now - timedelta(hours=age),
+                              level=level, source=source, message=source)
+        self.assertEqual(self.vm.get_last_diagnostic().message, "src2")
+        diag = self.vm.get_last_diagnostic(level="ERROR")
+        self.assertEqual(diag.message, "src1")
+        diag = self.vm.get_last_diagnostic(source="src1")
+        self.assertEqual(diag.message, "src1")
+        self.assertEqual(self.vm.get_last_diagnostic(level="INFO"), None)
+
+
+class VirtualMachineDiagnosticTest(TestCase):
+    def test_since(self):
+        vm = mfact.VirtualMachineFactory()
+        other_vm = mfact.VirtualMachineFactory()
+        now = timezone.now()
+        for machine in [vm, other_vm]:
+            for age, level in [(3, "ERROR"), (1, "ERROR"), (1, "DEBUG")]:
+                create_diagnostic(machine, now - timedelta(hours=age),
+                                  level=level, message="msg")
+        since = now - timedelta(hours=2)
+        diags = VirtualMachineDiagnostic.objects.since(vm, since)
+        self.assertEqual(diags.count(), 2)
+        for diag in diags:
+            self.assertEqual(diag.machine_id, vm.id)
+            self.assertTrue(diag.created > since)
+        diags = VirtualMachineDiagnostic.objects.since(vm, since,
+                                                       level="ERROR")
+        self.assertEqual(diags.count(), 1)
+
 
 class NetworkTest(TestCase):
     def setUp(self):
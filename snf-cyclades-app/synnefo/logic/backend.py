@@ -17,7 +17,7 @@ import json
 from datetime import datetime, timedelta
 
 from synnefo.db.models import (VirtualMachine, Network, Volume,
-                               BackendNetwork, BACKEND_STATUSES,
+                               BackendNetwork, BACKEND_STATUS_NAMES,
                                pooled_rapi_client, VirtualMachineDiagnostic,
                                Flavor, IPAddress, IPAddressHistory,
                                RescueImage)
@@ -135,7 +135,7 @@ def process_op_status(vm, etime, jobid, opcode, status, logmsg, nics=None,
     """
     # See #1492, #1031, #1111 why this line has been removed
     # if (opcode not in [x[0] for x in VirtualMachine.BACKEND_OPCODES] or
-    if status not in [x[0] for x in BACKEND_STATUSES]:
+    if status not in BACKEND_STATUS_NAMES:
         raise VirtualMachine.InvalidBackendMsgError(opcode, status)
 
     if opcode == "OP_INSTANCE_SNAPSHOT":
@@ -708,7 +708,7 @@ def update_snapshot(snapshot_id, user_id, job_id, job_status, etime):
 
 def process_network_status(back_network, etime, jobid, opcode, status, logmsg,
                            atomic_context=None):
-    if status not in [x[0] for x in BACKEND_STATUSES]:
+    if status not in BACKEND_STATUS_NAMES:
         raise Network.InvalidBackendMsgError(opcode, status)
 
     back_network.backendjobid = jobid
@@ -819,7 +819,7 @@ def update_network_state(network, atomic_context=None):
 def process_network_modify(back_network, etime, jobid, opcode, status,
                            job_fields):
     assert (opcode == "OP_NETWORK_SET_PARAMS")
-    if status not in [x[0] for x in BACKEND_STATUSES]:
+    if status not in BACKEND_STATUS_NAMES:
         raise Network.InvalidBackendMsgError(opcode, status)
 
     back_network.backendjobid = jobid
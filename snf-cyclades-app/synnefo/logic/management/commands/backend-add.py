@@ -118,7 +118,8 @@ class Command(SynnefoCommand):
             backend_mod.update_backend_resources(backend, resources)
             backend_mod.update_backend_disk_templates(backend)
 
-            networks = Network.objects.filter(deleted=False, public=True)
+            networks = Network.objects.filter(deleted=False, public=True)\
+                                      .prefetch_related("subnets")
             if not networks:
                 return
 
@@ -23,6 +23,7 @@ class Command(ListCommand):
     object_class = Flavor
     deleted_field = "deleted"
     select_related = ("volume_type", )
+    prefetch_related = ("specs", )
 
     def get_vms(flavor):
         return VirtualMachine.objects.filter(flavor=flavor, deleted=False)\
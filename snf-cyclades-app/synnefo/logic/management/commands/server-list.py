@@ -60,7 +60,7 @@ class Command(ListCommand):
     project_uuid_field = "project"
     astakos_auth_url = ASTAKOS_AUTH_URL
     astakos_token = ASTAKOS_TOKEN
-    select_related = ["flavor.volume_type"]
+    select_related = ["flavor__volume_type", "backend"]
 
     def get_ips(version, vm):
         ips = []
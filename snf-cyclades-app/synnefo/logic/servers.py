@@ -209,10 +209,9 @@ def _db_create_server(
                                 "Metadata key is too long")
         utils.check_name_length(val, VirtualMachineMetadata.VALUE_LENGTH,
                                 "Metadata value is too long")
-        VirtualMachineMetadata.objects.create(
-            meta_key=key,
-            meta_value=val,
-            vm=vm)
+    VirtualMachineMetadata.objects.bulk_create(
+        [VirtualMachineMetadata(meta_key=key, meta_value=val, vm=vm)
+         for key, val in metadata.items()])
 
     quotas.issue_and_accept_commission(vm, action="BUILD",
                                        atomic_context=atomic_context)
@@ -441,7 +440,7 @@ def set_firewall_profile(server_id, profile, nic_id, credentials=None,
         nic = util.get_vm_nic(vm, nic_id)
         log.info("Setting VM %s, NIC %s, firewall %s", vm, nic, profile)
 
-        if profile not in [x[0] for x in NetworkInterface.FIREWALL_PROFILES]:
+        if profile not in NetworkInterface.FIREWALL_PROFILE_NAMES:
             raise faults.BadRequest("Unsupported firewall profile")
         backend.set_firewall_profile(vm, profile=profile, nic=nic)
         return vm
@@ -15,7 +15,9 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 # Provides automated tests for logic module
+from django.db import connection
 from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from synnefo.logic import servers
 from synnefo.logic import backend
 from synnefo.logic.backend import GNT_EXTP_VOLTYPESPEC_PREFIX
@@ -27,27 +29,51 @@ from mock import patch, Mock
 from snf_django.lib.api import faults, Credentials
 from snf_django.utils.testing import mocked_quotaholder, override_settings
 from django.conf import settings
-from copy import deepcopy
-
-fixed_image = Mock()
-fixed_image.return_value = {'location': 'pithos://foo',
-                            'mapfile': 'test_mapfile',
-                            "id": 1,
-                            "name": "test_image",
-                            "version": 42,
-                            "is_public": True,
-                            "owner": "user2",
-                            "status": "AVAILABLE",
-                            "size": 1000,
-                            "is_snapshot": False,
-                            'disk_format': 'diskdump'}
+
+fixed_image = Mock(return_value={'location': 'pithos://foo',
+                                 'mapfile': 'test_mapfile',
+                                 "id": 1,
+                                 "name": "test_image",
+                                 "version": 42,
+                                 "is_public": True,
+                                 "owner": "user2",
+                                 "status": "AVAILABLE",
+                                 "size": 1000,
+                                 "is_snapshot": False,
+                                 'disk_format': 'diskdump'})
+
+
+def create_ext_volume_type():
+    """Create an 'ext_archipelago' volume type with volume type specs.
+
+    Generate 4 specs. 2 prefixed with GNT_EXTP_VOLTYPESPEC_PREFIX and 2 with
+    an other prefix that should be omitted. Return the volume type and the
+    ext provider kwargs that the prefixed specs should produce.
+
+    """
+    vlmt = mfactory.VolumeTypeFactory(disk_template='ext_archipelago')
+    volume_type_specs = [
+        mfactory.VolumeTypeSpecsFactory(
+            volume_type=vlmt, key='%sbar' % GNT_EXTP_VOLTYPESPEC_PREFIX),
+        mfactory.VolumeTypeSpecsFactory(
+            volume_type=vlmt, key='%sfoo' % GNT_EXTP_VOLTYPESPEC_PREFIX),
+        mfactory.VolumeTypeSpecsFactory(
+            volume_type=vlmt, key='other-prefx-baz'),
+        mfactory.VolumeTypeSpecsFactory(
+            volume_type=vlmt, key='another-prefix-biz'),
+    ]
+
+    prefix_len = len(GNT_EXTP_VOLTYPESPEC_PREFIX)
+    extp_kwargs = dict((spec.key[prefix_len:], spec.value)
+                       for spec in volume_type_specs
+                       if spec.key.startswith(GNT_EXTP_VOLTYPESPEC_PREFIX))
+    return vlmt, extp_kwargs
 
 
 @patch('synnefo.api.util.get_image', fixed_image)
 @patch("synnefo.logic.rapi_pool.GanetiRapiClient")
 class ServerCreationTest(TransactionTestCase):
-    def setUp(self):
-        self.credentials = Credentials("test")
+    credentials = Credentials("test")
 
     def test_create(self, mrapi):
         flavor = mfactory.FlavorFactory()
@@ -71,8 +97,7 @@ class ServerCreationTest(TransactionTestCase):
         backend = mfactory.BackendFactory()
 
         # error in nics
-        req = deepcopy(kwargs)
-        req["networks"] = [{"uuid": 42}]
+        req = dict(kwargs, networks=[{"uuid": 42}])
         self.assertRaises(faults.ItemNotFound, servers.create, **req)
         self.assertEqual(models.VirtualMachine.objects.count(), 0)
 
@@ -87,27 +112,11 @@ class ServerCreationTest(TransactionTestCase):
             self.assertEqual(nic.state, "ERROR")
 
         # test ext settings:
-        req = deepcopy(kwargs)
-        vlmt = mfactory.VolumeTypeFactory(disk_template='ext_archipelago')
-        # Generate 4 specs. 2 prefixed with GNT_EXTP_VOLTYPESPEC_PREFIX
-        # and 2 with an other prefix that should be omitted
-        volume_type_specs = [
-            mfactory.VolumeTypeSpecsFactory(
-                volume_type=vlmt, key='%sbar' % GNT_EXTP_VOLTYPESPEC_PREFIX),
-            mfactory.VolumeTypeSpecsFactory(
-                volume_type=vlmt, key='%sfoo' % GNT_EXTP_VOLTYPESPEC_PREFIX),
-            mfactory.VolumeTypeSpecsFactory(
-                volume_type=vlmt, key='other-prefx-baz'),
-            mfactory.VolumeTypeSpecsFactory(
-                volume_type=vlmt, key='another-prefix-biz'),
-        ]
-
-        gnt_prefixed_specs = filter(lambda s: s.key.startswith(
-            GNT_EXTP_VOLTYPESPEC_PREFIX), volume_type_specs)
+        vlmt, extp_kwargs = create_ext_volume_type()
         ext_flavor = mfactory.FlavorFactory(
             volume_type=vlmt,
             disk=1)
-        req["flavor"] = ext_flavor
+        req = dict(kwargs, flavor=ext_flavor)
         mrapi().CreateInstance.return_value = 42
         backend.disk_templates = ["ext"]
         backend.save()
@@ -139,9 +148,7 @@ class ServerCreationTest(TransactionTestCase):
                        "foo": "mpaz",
                        "lala": "lolo",
                        "size": 1024}
-        disk_kwargs.update({spec.key[len(GNT_EXTP_VOLTYPESPEC_PREFIX):]:
-                            spec.value
-                            for spec in gnt_prefixed_specs})
+        disk_kwargs.update(extp_kwargs)
         self.assertEqual(kwargs["disks"][0], disk_kwargs)
 
 
@@ -149,6 +156,9 @@ class ServerCreationTest(TransactionTestCase):
 class ServerTest(TransactionTestCase):
 
     def test_connect_network(self, mrapi):
+        # Use the same VM for all connections and clear the pending task
+        # after each one
+        vm = mfactory.VirtualMachineFactory(operstate="STARTED")
         # Common connect
         for dhcp in [True, False]:
             subnet = mfactory.IPv4SubnetFactory(network__flavor="CUSTOM",
@@ -156,7 +166,6 @@ class ServerTest(TransactionTestCase):
                                                 gateway="192.168.2.1",
                                                 dhcp=dhcp)
             net = subnet.network
-            vm = mfactory.VirtualMachineFactory(operstate="STARTED")
             mfactory.BackendNetworkFactory(network=net, backend=vm.backend)
             mrapi().ModifyInstance.return_value = 42
             with override_settings(settings, GANETI_USE_HOTPLUG=True):
@@ -172,9 +181,11 @@ class ServerTest(TransactionTestCase):
             self.assertEqual(nics[1], "-1")
             self.assertEqual(nics[2]["ip"], "192.168.2.2")
             self.assertEqual(nics[2]["network"], net.backend_id)
+            vm.task = None
+            vm.task_job_id = None
+            vm.save()
 
         # Test connect to IPv6 only network
-        vm = mfactory.VirtualMachineFactory(operstate="STARTED")
         subnet = mfactory.IPv6SubnetFactory(cidr="2000::/64",
                                             gateway="2000::1")
         net = subnet.network
@@ -195,22 +206,7 @@ class ServerTest(TransactionTestCase):
         """Test volume type spces propagation when attaching a
            volume to an instance
         """
-        vlmt = mfactory.VolumeTypeFactory(disk_template='ext_archipelago')
-        # Generate 4 specs. 2 prefixed with GNT_EXTP_VOLTYPESPEC_PREFIX
-        # and 2 with an other prefix that should be omitted
-        volume_type_specs = [
-            mfactory.VolumeTypeSpecsFactory(
-                volume_type=vlmt, key='%sbar' % GNT_EXTP_VOLTYPESPEC_PREFIX),
-            mfactory.VolumeTypeSpecsFactory(
-                volume_type=vlmt, key='%sfoo' % GNT_EXTP_VOLTYPESPEC_PREFIX),
-            mfactory.VolumeTypeSpecsFactory(
-                volume_type=vlmt, key='other-prefx-baz'),
-            mfactory.VolumeTypeSpecsFactory(
-                volume_type=vlmt, key='another-prefix-biz'),
-        ]
-
-        gnt_prefixed_specs = filter(lambda s: s.key.startswith(
-            GNT_EXTP_VOLTYPESPEC_PREFIX), volume_type_specs)
+        vlmt, extp_kwargs = create_ext_volume_type()
         volume = mfactory.VolumeFactory(volume_type=vlmt, size=1)
         vm = volume.machine
         osettings = {
@@ -229,14 +225,12 @@ class ServerTest(TransactionTestCase):
             name, args, kwargs = mrapi().ModifyInstance.mock_calls[-1]
 
             disk_kwargs = {"provider": "archipelago",
-                           "name": vm.volumes.all()[0].backend_volume_uuid,
+                           "name": volume.backend_volume_uuid,
                            "reuse_data": 'False',
                            "foo": "mpaz",
                            "lala": "lolo",
                            "size": 1024}
-            disk_kwargs.update({spec.key[len(GNT_EXTP_VOLTYPESPEC_PREFIX):]:
-                                spec.value
-                                for spec in gnt_prefixed_specs})
+            disk_kwargs.update(extp_kwargs)
 
         # Should be "disks": [('add', '-1', {disk_kwargs}), ]
         disk = kwargs["disks"][0]
@@ -275,8 +269,7 @@ class ServerTest(TransactionTestCase):
 
 @patch("synnefo.logic.rapi_pool.GanetiRapiClient")
 class ServerCommandTest(TransactionTestCase):
-    def setUp(self):
-        self.credentials = Credentials("admin_id", is_admin=True)
+    credentials = Credentials("admin_id", is_admin=True)
 
     def test_pending_task(self, mrapi):
         vm = mfactory.VirtualMachineFactory(task="REBOOT", task_job_id=1)
@@ -300,19 +293,22 @@ class ServerCommandTest(TransactionTestCase):
                           self.credentials)
 
     def test_invalid_operstate_for_action(self, mrapi):
+        # The rejected actions do not modify the VM, so the same VM is used
+        # for all checks, changing only its operstate.
         vm = mfactory.VirtualMachineFactory(operstate="STARTED")
         self.assertRaises(faults.BadRequest, servers.start, vm.id,
                           credentials=self.credentials)
-        vm = mfactory.VirtualMachineFactory(operstate="STOPPED")
+        vm.operstate = "STOPPED"
+        vm.save()
         self.assertRaises(faults.BadRequest, servers.stop, vm.id,
                           credentials=self.credentials)
-        vm = mfactory.VirtualMachineFactory(operstate="STARTED")
+        vm.operstate = "STARTED"
+        vm.save()
         flavor = mfactory.FlavorFactory()
         self.assertRaises(faults.BadRequest, servers.resize, vm.id, flavor,
                           credentials=self.credentials)
         # Check that connect/disconnect is allowed only in STOPPED vms
         # if hotplug is disabled.
-        vm = mfactory.VirtualMachineFactory(operstate="STARTED")
         network = mfactory.NetworkFactory(state="ACTIVE")
         with override_settings(settings, GANETI_USE_HOTPLUG=False):
             port = servers._create_port(vm.userid, network)
@@ -321,7 +317,8 @@ class ServerCommandTest(TransactionTestCase):
             self.assertRaises(faults.BadRequest, servers.disconnect_port,
                               vm, network)
         # test valid
-        vm = mfactory.VirtualMachineFactory(operstate="STOPPED")
+        vm.operstate = "STOPPED"
+        vm.save()
         mrapi().StartupInstance.return_value = 1
         with mocked_quotaholder():
             servers.start(vm.id, credentials=self.credentials)
@@ -520,8 +517,27 @@ class ServerCommandTest(TransactionTestCase):
             vol = vm.volumes.get(id=volume.id)
             self.assertEqual(vol.project, original_project)
 
+    def test_reassign_vm_queries(self, mrapi):
+        """Test that reassigning a VM does not query each of its volumes"""
+        def count_reassign_queries(volumes):
+            vm = mfactory.VirtualMachineFactory()
+            # Reassign and its commission only handle the root volumes
+            # (index=0), so make them all root volumes to let the reassign
+            # path walk each of them
+            for _ in range(volumes):
+                mfactory.VolumeFactory(machine=vm, userid=vm.userid,
+                                       project=vm.project, index=0)
+            with mocked_quotaholder():
+                with CaptureQueriesContext(connection) as queries:
+                    servers.reassign(vm.id, "another_project", True,
+                                     credentials=self.credentials)
+            return len(queries)
+
+        self.assertEqual(count_reassign_queries(1), count_reassign_queries(3))
+
 
 class ServerRescueTest(TransactionTestCase):
+    credentials = Credentials("test")
 
     def setUp(self):
         self.debian_rescue_image = mfactory.RescueImageFactory(
@@ -531,69 +547,74 @@ class ServerRescueTest(TransactionTestCase):
             target_os_family='windows', target_os='windows',
             location='test-path-win.iso', name='Test Windows Rescue Image',
             is_default=True)
-        self.vm = mfactory.VirtualMachineFactory()
-        self.credentials = Credentials("test")
 
     def test_rescue_started_vm(self):
         """Test rescue a started VM"""
+        # The action is rejected before touching the DB, so the VM does not
+        # need to be saved
+        vm = mfactory.VirtualMachineFactory.build()
         with mocked_quotaholder():
-            self.vm.task = None
-            self.vm.operstate = "STARTED"
-            print(self.credentials)
+            vm.task = None
+            vm.operstate = "STARTED"
             with self.assertRaises(faults.BadRequest):
-                servers.rescue(self.vm, credentials=self.credentials)
+                servers.rescue(vm, credentials=self.credentials)
 
     def test_rescue_stopped_rescued_vm(self):
         """Test rescue a stopped VM while in rescue mode"""
+        vm = mfactory.VirtualMachineFactory.build()
         with mocked_quotaholder():
-            self.vm.task = None
-            self.vm.operstate = "STOPPED"
-            self.vm.rescue = True
+            vm.task = None
+            vm.operstate = "STOPPED"
+            vm.rescue = True
             with self.assertRaises(faults.BadRequest):
-                servers.rescue(self.vm, credentials=self.credentials)
+                servers.rescue(vm, credentials=self.credentials)
 
     @patch("synnefo.logic.rapi_pool.GanetiRapiClient")
     def test_rescue_stopped_vm(self, mrapi):
         """Test rescue a stopped VM"""
         mrapi().ModifyInstance.return_value = 1
+        vm = mfactory.VirtualMachineFactory()
         # Since we are not using rescue properties, the default
         # image should be used.
         with mocked_quotaholder():
-            self.vm.task = None
-            self.vm.rescue = False
-            self.vm.operstate = "STOPPED"
-            servers.rescue(self.vm, credentials=self.credentials)
-            self.assertEqual(self.vm.task_job_id, 1)
-            self.assertFalse(self.vm.rescue_image is None)
-            self.assertTrue(self.vm.rescue_image.is_default)
+            vm.task = None
+            vm.rescue = False
+            vm.operstate = "STOPPED"
+            servers.rescue(vm, credentials=self.credentials)
+            self.assertEqual(vm.task_job_id, 1)
+            self.assertFalse(vm.rescue_image is None)
+            self.assertTrue(vm.rescue_image.is_default)
 
     def test_unrescue_started_vm(self):
         """Test unrescue a started VM"""
+        vm = mfactory.VirtualMachineFactory.build()
         with mocked_quotaholder():
-            self.vm.task = None
-            self.vm.operstate = "STARTED"
+            vm.task = None
+            vm.operstate = "STARTED"
             with self.assertRaises(faults.BadRequest):
-                servers.unrescue(self.vm, credentials=self.credentials)
+                servers.unrescue(vm, credentials=self.credentials)
 
     def test_unrescue_stopped_unrescued_vm(self):
         """Test unrescue a VM that is not in rescue mode"""
+        vm = mfactory.VirtualMachineFactory.build()
         with mocked_quotaholder():
-            self.vm.operstate = "STOPPED"
-            self.vm.rescue = False
+            vm.operstate = "STOPPED"
+            vm.rescue = False
             with self.assertRaises(faults.BadRequest):
-                servers.unrescue(self.vm, credentials=self.credentials)
+                servers.unrescue(vm, credentials=self.credentials)
 
     @patch("synnefo.logic.rapi_pool.GanetiRapiClient")
     def test_unrescue_stopped_vm(self, mrapi):
         """Test unrescue a stopped VM in rescue mode"""
         mrapi().ModifyInstance.return_value = 1
+        vm = mfactory.VirtualMachineFactory()
         with mocked_quotaholder():
-            self.vm.task = None
-            self.vm.operstate = "STOPPED"
-            self.vm.rescue = True
-            self.vm.rescue_image = self.debian_rescue_image
-            servers.unrescue(self.vm, credentials=self.credentials)
-            self.assertEqual(self.vm.task_job_id, 1)
+            vm.task = None
+            vm.operstate = "STOPPED"
+            vm.rescue = True
+            vm.rescue_image = self.debian_rescue_image
+            servers.unrescue(vm, credentials=self.credentials)
+            self.assertEqual(vm.task_job_id, 1)
 
     @patch("synnefo.logic.rapi_pool.GanetiRapiClient")
     def test_rescue_vm_rescue_properties(self, mrapi):
@@ -318,7 +318,7 @@ def pprint_server_nics(server, stdout=None, title=None):
         stdout = sys.stdout
 
     nics = []
-    for nic in server.nics.all():
+    for nic in server.nics.select_related("network").prefetch_related("ips"):
         nics.append((nic.id, nic.name, nic.index, nic.mac, nic.ipv4_address,
                      nic.ipv6_address, nic.network, nic.firewall_profile,
                      nic.state))
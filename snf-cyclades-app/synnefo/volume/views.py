@@ -269,11 +269,12 @@ def update_volume_metadata(request, volume_id, reset=False):
                                     settings.CYCLADES_VOLUME_MAX_METADATA)
 
         volume.metadata.all().delete()
-        for key, value in meta_dict.items():
-            volume.metadata.create(key=key, value=value)
+        VolumeMetadata.objects.bulk_create(
+            [VolumeMetadata(volume=volume, key=key, value=value)
+             for key, value in meta_dict.items()])
     else:
-        if len(meta_dict) + len(volume.metadata.all()) - \
-           len(volume.metadata.all().filter(key__in=meta_dict.keys())) > \
+        if len(meta_dict) + volume.metadata.count() - \
+           volume.metadata.filter(key__in=meta_dict.keys()).count() > \
            settings.CYCLADES_VOLUME_MAX_METADATA:
             raise faults.BadRequest("Volumes cannot have more than %s metadata"
                                     " items" %
@@ -161,7 +161,9 @@ def create_common(user_id, size, name=None, description=None,
                                     "Metadata key is too long")
             utils.check_name_length(meta_val, VolumeMetadata.VALUE_LENGTH,
                                     "Metadata value is too long")
-            volume.metadata.create(key=meta_key, value=meta_val)
+        VolumeMetadata.objects.bulk_create(
+            [VolumeMetadata(volume=volume, key=meta_key, value=meta_val)
+             for meta_key, meta_val in metadata.items()])
 
     return volume
 
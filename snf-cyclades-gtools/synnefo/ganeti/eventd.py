@@ -64,11 +64,15 @@ except ImportError:
                     " under %s for 2.8 or under %s for 2.10 or later." %
                     (OLD_GANETI_PATH, NEW_GANETI_PATH))
 
-from ganeti import utils, jqueue, constants, serializer, pathutils, cli, \
+from ganeti import utils, constants, serializer, pathutils, cli, \
     netutils  # noqa
 from ganeti import errors as ganeti_errors  # noqa
 from ganeti.ssconf import SimpleStore  # noqa
 
+# Compatibility with Ganeti version
+JOB_STATUS_WAITING = getattr(constants, "JOB_STATUS_WAITLOCK", None) or \
+    constants.JOB_STATUS_WAITING
+
 
 def get_time_from_status(op, job):
     """Generate a unique message identifier for a ganeti job.
@@ -77,22 +81,19 @@ def get_time_from_status(op, job):
     job passes from multiple states, we need to pick the timestamp that
     corresponds to each state.
 
+    Both 'op' and 'job' are the dictionaries found in the job file.
+
     """
-    status = op.status
+    status = op["status"]
+    job_end = job.get("end_timestamp")
     if status == constants.JOB_STATUS_QUEUED:
-        return job.received_timestamp
-    try:  # Compatibility with Ganeti version
-        if status == constants.JOB_STATUS_WAITLOCK:
-            return op.start_timestamp or job.end_timestamp
-    except AttributeError:
-        if status == constants.JOB_STATUS_WAITING:
-            return op.start_timestamp or job.end_timestamp
-    if status == constants.JOB_STATUS_CANCELING:
-        return op.start_timestamp or job.end_timestamp
+        return job.get("received_timestamp")
+    if status in (JOB_STATUS_WAITING, constants.JOB_STATUS_CANCELING):
+        return op.get("start_timestamp") or job_end
     if status == constants.JOB_STATUS_RUNNING:
-        return op.exec_timestamp or job.end_timestamp
+        return op.get("exec_timestamp") or job_end
     if status in constants.JOBS_FINALIZED:
-        return op.end_timestamp or job.end_timestamp
+        return op.get("end_timestamp") or job_end
 
     raise InvalidBackendStatus(status, job)
 
@@ -189,10 +190,7 @@ def prefix_from_name(name):
 
 
 def get_field(from_, field):
-    try:
-        return getattr(from_, field)
-    except AttributeError:
-        None
+    return from_.get(field)
 
 
 def get_ganeti_master():
@@ -249,82 +247,75 @@ class JobFileHandler(pyinotify.ProcessEvent):
         self.process_IN_MOVED_TO(event)
 
     def process_IN_MOVED_TO(self, event):
-        jobfile = os.path.join(event.path, event.name)
+        # Ganeti writes job files through temporary files in the same
+        # directory, so filter on the name before touching the filesystem.
         if not event.name.startswith("job-"):
-            self.logger.debug("Not a job file: %s" % event.path)
+            self.logger.debug("Not a job file: %s", event.name)
             return
 
+        jobfile = os.path.join(event.path, event.name)
+
         try:
             data = utils.ReadFile(jobfile)
         except IOError:
             return
 
-        data = serializer.LoadJson(data)
-        job = jqueue._QueuedJob.Restore(None, data, False, False)
-
-        job_id = int(job.id)
+        # Work on the serialized job directly instead of restoring it as a
+        # _QueuedJob, which would also rebuild and validate every opcode.
+        job = serializer.LoadJson(data)
 
-        for op in job.ops:
-            op_id = op.input.OP_ID
+        job_id = int(job["id"])
 
-            msg = None
+        msgs = []
+        for op in job["ops"]:
+            op_id = op["input"]["OP_ID"]
+            # Skip only the failing op and publish the rest of the job
             try:
-                handler_fn = self.op_handlers[op_id.split('_')[1]]
-                msg, routekey = handler_fn(op, job_id)
-            except KeyError:
-                pass
+                msg, routekey = self.get_op_msg(op, job, job_id)
+            except KeyError as e:
+                # e.g. the instance is no longer in the Ganeti config
+                self.logger.warning("Ignoring job: %s: %s. Missing key: %s",
+                                    job_id, op_id, e)
+                continue
+            except Exception:
+                self.logger.exception("Failed to process job: %s: %s",
+                                      job_id, op_id)
+                continue
 
             if not msg:
                 self.logger.debug("Ignoring job: %s: %s", job_id, op_id)
                 continue
 
-            # Generate a unique message identifier
-            event_time = get_time_from_status(op, job)
+            msgs.append((routekey, msg))
 
-            # Get the last line of the op log as message
-            try:
-                logmsg = op.log[-1][-1]
-            except IndexError:
-                logmsg = None
-
-            # Add shared attributes for all operations
-            msg.update({"event_time": event_time,
-                        "operation": op_id,
-                        "status": op.status,
-                        "cluster": self.cluster_name,
-                        "logmsg": logmsg,
-                        "result": op.result,
-                        "jobId": job_id})
-
-            if op.status == "success":
-                msg["result"] = op.result
-
-            if op_id == "OP_INSTANCE_CREATE" and op.status == "error":
-                # In case an instance creation fails send the job input
-                # so that the job can be retried if needed.
-                msg["job_fields"] = op.Serialize()["input"]
-
-            # Check if this is the master node. Only the master node should
-            # deliver messages to RabbitMQ.
-            current_master = get_ganeti_master()
-            if self.ganeti_master != current_master:
-                self.logger.warning("Ganeti Master changed! New Master: %s",
-                                    current_master)
-
-                if self.ganeti_node == current_master:
-                    self.logger.info("This node became Ganeti Master.")
-                else:
-                    self.logger.info("This node is not Ganeti Master.")
-
-                self.ganeti_master = current_master
-
-            msg = json.dumps(msg)
-
-            if self.ganeti_node != self.ganeti_master:
-                self.logger.debug(
-                    "Ignoring msg for job: %s: %s. Reason: Not Master",
-                    job_id, op_id)
-                continue
+        if not msgs:
+            return
+
+        # Check if this is the master node. Only the master node should
+        # deliver messages to RabbitMQ. The check is done once per job file,
+        # since all of its ops are published together.
+        current_master = get_ganeti_master()
+        if self.ganeti_master != current_master:
+            self.logger.warning("Ganeti Master changed! New Master: %s",
+                                current_master)
+
+            if self.ganeti_node == current_master:
+                self.logger.info("This node became Ganeti Master.")
+            else:
+                self.logger.info("This node is not Ganeti Master.")
+
+            self.ganeti_master = current_master
+
+        if self.ganeti_node != self.ganeti_master:
+            self.logger.debug("Ignoring msgs for job: %s. Reason: Not Master",
+                              job_id)
+            return
+
+        for routekey, msg in msgs:
+            # Serialize only on the master, which is the only node that
+            # publishes. Compact separators keep the payload small;
+            # dispatcher only needs valid JSON.
+            msg = json.dumps(msg, separators=(",", ":"))
 
             self.logger.debug("Delivering msg: %s (key=%s)", msg, routekey)
 
@@ -335,12 +326,54 @@ class JobFileHandler(pyinotify.ProcessEvent):
                                       routekey,
                                       msg)
 
+    def get_op_msg(self, op, job, job_id):
+        """Build the message and routing key for an op of a job file.
+
+        Returns (None, None) for ops that should not be published.
+
+        """
+        op_id = op["input"]["OP_ID"]
+
+        handler_fn = self.op_handlers.get(op_id.split('_', 2)[1])
+        if handler_fn is None:
+            return None, None
+
+        msg, routekey = handler_fn(op, job_id)
+        if not msg:
+            return None, None
+
+        # Generate a unique message identifier
+        event_time = get_time_from_status(op, job)
+
+        # Get the last line of the op log as message
+        log = op["log"]
+        logmsg = log[-1][-1] if log else None
+
+        # Add shared attributes for all operations
+        msg.update({"event_time": event_time,
+                    "operation": op_id,
+                    "status": op["status"],
+                    "cluster": self.cluster_name,
+                    "logmsg": logmsg,
+                    "result": op["result"],
+                    "jobId": job_id})
+
+        if op["status"] == "success":
+            msg["result"] = op["result"]
+
+        if op_id == "OP_INSTANCE_CREATE" and op["status"] == "error":
+            # In case an instance creation fails send the job input
+            # so that the job can be retried if needed.
+            msg["job_fields"] = op["input"]
+
+        return msg, routekey
+
     def process_instance_op(self, op, job_id):
         """ Process OP_INSTANCE_* opcodes.
 
         """
-        input = op.input
-        op_id = input.OP_ID
+        input = op["input"]
+        op_id = input["OP_ID"]
 
         instances = None
         instances = get_field(input, 'instance_name')
@@ -355,7 +388,7 @@ class JobFileHandler(pyinotify.ProcessEvent):
                 instances = instances[0]
 
         self.logger.debug("Job: %d: %s(%s) %s", job_id, op_id,
-                          instances, op.status)
+                          instances, op["status"])
 
         job_fields = {}
         if op_id in ["OP_INSTANCE_SET_PARAMS", "OP_INSTANCE_CREATE"]:
@@ -390,9 +423,9 @@ class JobFileHandler(pyinotify.ProcessEvent):
                "job_fields": job_fields}
 
         if ((op_id in ["OP_INSTANCE_CREATE", "OP_INSTANCE_STARTUP"] and
-             op.status == "success") or
+             op["status"] == "success") or
             (op_id in ["OP_INSTANCE_SET_PARAMS", "OP_INSTANCE_GROW_DISK"] and
-             op.status in ["success", "error", "cancelled"])):
+             op["status"] in ["success", "error", "cancelled"])):
                 instance_info = get_instance_info(msg["instance"], self.logger)
                 msg["instance_nics"] = instance_info["nics"]
                 msg["instance_disks"] = instance_info["disks"]
@@ -407,15 +440,15 @@ class JobFileHandler(pyinotify.ProcessEvent):
 
         """
 
-        input = op.input
-        op_id = input.OP_ID
+        input = op["input"]
+        op_id = input["OP_ID"]
         network_name = get_field(input, 'network_name')
 
         if not network_name:
             return None, None
 
         self.logger.debug("Job: %d: %s(%s) %s", job_id, op_id,
-                          network_name, op.status)
+                          network_name, op["status"])
 
         job_fields = {
             'subnet': get_field(input, 'network'),
@@ -440,10 +473,10 @@ class JobFileHandler(pyinotify.ProcessEvent):
 
         """
 
-        input = op.input
-        op_id = input.OP_ID
+        input = op["input"]
+        op_id = input["OP_ID"]
 
-        self.logger.debug("Job: %d: %s %s", job_id, op_id, op.status)
+        self.logger.debug("Job: %d: %s %s", job_id, op_id, op["status"])
 
         if op_id != "OP_CLUSTER_SET_PARAMS":
             # Send only modifications of cluster
@@ -460,17 +493,17 @@ class JobFileHandler(pyinotify.ProcessEvent):
         """ Process OP_TAGS_* opcodes.
 
         """
-        input = op.input
-        op_id = input.OP_ID
+        input = op["input"]
+        op_id = input["OP_ID"]
         if op_id == "OP_TAGS_SET":
             # NOTE: Check 'dry_run' after 'cluster' because networks and groups
             # do not support the 'dry_run' option.
-            if (op.status == "waiting" and input.tags and
-               input.kind == "cluster" and input.dry_run):
+            if (op["status"] == "waiting" and input.get("tags") and
+               input.get("kind") == "cluster" and input.get("dry_run")):
                 # Special where a prefixed cluster tag operation in dry-run
                 # mode is used in order to trigger eventd to send a
                 # heartbeat message.
-                tag = input.tags[0]
+                tag = input["tags"][0]
                 if tag.startswith("snf:eventd:heartbeat"):
                     self.logger.debug("Received heartbeat tag '%s'."
                                       " Sending response.", tag)
@@ -481,6 +514,29 @@ class JobFileHandler(pyinotify.ProcessEvent):
         return None, None
 
 
+def coalesce_events(notifier):
+    """Keep only the last queued inotify event for each file.
+
+    Ganeti rewrites a job file every time the job makes progress and the
+    handler always reads the current contents of the file, so earlier
+    events for the same file would only publish the same messages again.
+
+    """
+    # pyinotify does not offer a public way to inspect the event queue
+    events = notifier._eventq
+    if len(events) < 2:
+        return
+    seen = set()
+    coalesced = []
+    for event in reversed(events):
+        key = (event.wd, event.name)
+        if key not in seen:
+            seen.add(key)
+            coalesced.append(event)
+    events.clear()
+    events.extend(reversed(coalesced))
+
+
 def find_cluster_name():
     global handler_logger
     try:
@@ -606,6 +662,7 @@ def main():
             if notifier.check_events():
                 # read notified events and enqeue them
                 notifier.read_events()
+                coalesce_events(notifier)
     except SystemExit:
         logger.info("SystemExit")
     except:
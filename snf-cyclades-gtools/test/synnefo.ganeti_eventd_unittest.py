@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010-2017 GRNET S.A.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import sys
+import json
+import logging
+from mock import patch
+from synnefo.ganeti import eventd
+from synnefo.ganeti.eventd import JobFileHandler
+
+log = logging.getLogger()
+
+# Use backported unittest functionality if Python < 2.7
+try:
+    import unittest2 as unittest
+except ImportError:
+    if sys.version_info < (2, 7):
+        raise Exception("The unittest2 package is required for Python < 2.7")
+    import unittest
+
+
+MASTER = "master.example.org"
+
+
+class JobFileEvent(object):
+    def __init__(self, name, path="/var/lib/ganeti/queue"):
+        self.name = name
+        self.path = path
+
+
+def job_op(op_id, instance, status="success"):
+    return {"input": {"OP_ID": op_id, "instance_name": instance},
+            "status": status,
+            "log": [],
+            "result": None,
+            "end_timestamp": [1500000000, 0]}
+
+
+@patch("synnefo.ganeti.eventd.get_ganeti_master", return_value=MASTER)
+class JobFileHandlerTestCase(unittest.TestCase):
+    def setUp(self):
+        # Do not connect to RabbitMQ or ask Ganeti for the master node
+        with patch("synnefo.ganeti.eventd.AMQPClient"):
+            with patch("synnefo.ganeti.eventd.get_ganeti_master",
+                       return_value=MASTER):
+                with patch("synnefo.ganeti.eventd.get_ganeti_node",
+                           return_value=MASTER):
+                    self.handler = JobFileHandler(log, "cluster")
+
+    def process_job(self, ops, config):
+        job = json.dumps({"id": "42", "ops": ops,
+                          "end_timestamp": [1500000000, 0]})
+
+        def read_file(path):
+            if path == eventd.pathutils.CLUSTER_CONF_FILE:
+                return json.dumps(config)
+            return job
+
+        # Not on master: instance info comes from the config file
+        with patch("synnefo.ganeti.eventd.cli.GetClient",
+                   side_effect=eventd.ganeti_errors.OpPrereqError):
+            with patch("synnefo.ganeti.eventd.utils.ReadFile",
+                       side_effect=read_file):
+                self.handler.process_IN_MOVED_TO(JobFileEvent("job-42"))
+
+    def test_unknown_instance(self, master):
+        ops = [job_op("OP_INSTANCE_STARTUP", "snf-1"),
+               job_op("OP_INSTANCE_SHUTDOWN", "snf-2")]
+        self.process_job(ops, {"instances": {}})
+
+        publish = self.handler.client.basic_publish
+        self.assertEqual(publish.call_count, 1)
+        msg = json.loads(publish.call_args[0][2])
+        self.assertEqual(msg["operation"], "OP_INSTANCE_SHUTDOWN")
+        self.assertEqual(msg["instance"], "snf-2")
+
+    def test_failing_op_in_batch(self, master):
+        ops = [job_op("OP_INSTANCE_SHUTDOWN", "snf-1"),
+               job_op("OP_INSTANCE_REBOOT", "snf-2", status="bogus"),
+               job_op("OP_INSTANCE_SHUTDOWN", "snf-3")]
+        self.process_job(ops, {"instances": {}})
+
+        publish = self.handler.client.basic_publish
+        instances = [json.loads(args[2])["instance"]
+                     for args, kwargs in publish.call_args_list]
+        self.assertEqual(instances, ["snf-1", "snf-3"])
+
+    def test_failure_logging(self, master):
+        # Expected misses are logged without a traceback
+        ops = [job_op("OP_INSTANCE_STARTUP", "snf-1")]
+        with patch.object(self.handler, "logger") as logger:
+            self.process_job(ops, {"instances": {}})
+        self.assertEqual(logger.warning.call_count, 1)
+        self.assertFalse(logger.exception.called)
+
+        ops = [job_op("OP_INSTANCE_REBOOT", "snf-2", status="bogus")]
+        with patch.object(self.handler, "logger") as logger:
+            self.process_job(ops, {"instances": {}})
+        self.assertEqual(logger.exception.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -139,6 +139,8 @@ def fabcommand(args, actions):
         for a in actions:
             fn = getattr(fabfile, a)
             execute(fn)
+            # Store the status of the components set up by this action
+            status.flush()
 
 
 def get_packages():
@@ -1273,8 +1273,7 @@ class CMS(base.Component):
     def initialize(self):
         return [
             "snf-manage migrate",
-            "snf-manage loaddata /tmp/sites.json",
-            "snf-manage loaddata /tmp/page.json",
+            "snf-manage loaddata /tmp/sites.json /tmp/page.json",
             "snf-manage createsuperuser --username=admin \
                   --email=admin@%s --noinput" % self.node.domain,
             ]
@@ -14,6 +14,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import ConfigParser
+import atexit
 import os
 import sys
 from snfdeploy import constants
@@ -24,35 +25,61 @@ from snfdeploy.lib import create_passwd
 status = sys.modules[__name__]
 
 
-def _lock_read_write(fn):
-    def wrapper(*args, **kwargs):
-        with filelocker.lock(status.lockfile, filelocker.LOCK_EX):
-            status.cfg.read(status.statusfile)
-            ret = fn(*args, **kwargs)
-            if config.force or not config.dry_run:
-                with open(status.statusfile, 'wb') as configfile:
-                    status.cfg.write(configfile)
-        return ret
-    return wrapper
+def _read(filename):
+    """Read a status file into a dict of sections to options"""
+    cfg = ConfigParser.ConfigParser()
+    cfg.optionxform = str
+    cfg.read(filename)
+    return dict((section, dict(cfg.items(section, True)))
+                for section in cfg.sections())
+
+
+def _write():
+    if not (config.force or not config.dry_run):
+        return
+    with filelocker.lock(status.lockfile, filelocker.LOCK_EX):
+        # Merge with any updates done by other runs since we read the file
+        data = _read(status.statusfile)
+        for section, options in status.data.items():
+            data.setdefault(section, {}).update(options)
+        status.data = data
+
+        cfg = ConfigParser.ConfigParser()
+        cfg.optionxform = str
+        for section in sorted(data):
+            cfg.add_section(section)
+            for option, value in data[section].items():
+                cfg.set(section, option, value)
+        # Write to a temporary file and rename it, so that readers never
+        # see a partially written status file
+        tmpfile = "%s.tmp" % status.statusfile
+        with open(tmpfile, 'wb') as configfile:
+            cfg.write(configfile)
+        os.rename(tmpfile, status.statusfile)
+
+
+def _data():
+    # The status file is read once and then kept in memory. Writes replace
+    # the file atomically, so no lock is needed to read it.
+    if status.data is None:
+        status.data = _read(status.statusfile)
+    return status.data
 
 
-def _create_section(section):
-    if not status.cfg.has_section(section):
-        status.cfg.add_section(section)
-
-
-@_lock_read_write
 def _check(section, option):
-    try:
-        return status.cfg.get(section, option, True)
-    except (ConfigParser.NoSectionError, ConfigParser.NoOptionError):
-        return None
+    return _data().get(section, {}).get(option)
 
 
-@_lock_read_write
 def _update(section, option, value):
-    _create_section(section)
-    status.cfg.set(section, option, value)
+    _data().setdefault(section, {})[option] = value
+    status.dirty = True
+
+
+def flush():
+    """Write any pending status updates to the status file"""
+    if status.dirty:
+        _write()
+        status.dirty = False
 
 
 def get_passwd(setup, target):
@@ -60,6 +87,9 @@ def get_passwd(setup, target):
     if not passwd:
         passwd = create_passwd(constants.DEFAULT_PASSWD_LENGTH)
         _update(setup, target, passwd)
+        # Passwords are used on the nodes right away; do not risk losing
+        # them if the deployment gets killed
+        flush()
     return passwd
 
 
@@ -76,6 +106,8 @@ def check(component):
 
 
 def reset():
+    status.data = None
+    status.dirty = False
     try:
         os.remove(status.statusfile)
     except OSError:
@@ -84,7 +116,8 @@ def reset():
 
 def init():
     status.state_dir = config.state_dir
-    status.cfg = ConfigParser.ConfigParser()
-    status.cfg.optionxform = str
     status.statusfile = os.path.join(config.state_dir, constants.STATUS_FILE)
     status.lockfile = "%s.lock" % status.statusfile
+    status.data = None
+    status.dirty = False
+    atexit.register(flush)
@@ -0,0 +1,96 @@
+import sys
+from datetime import datetime, timedelta
+
+from dateutil.tz import tzutc
+from django.conf import settings
+from django.core.cache import cache
+from mock import patch
+
+from snf_django.lib import utils
+from snf_django.utils.testing import override_settings
+
+# Use backported unittest functionality if Python < 2.7
+try:
+    import unittest2 as unittest
+except ImportError:
+    if sys.version_info < (2, 7):
+        raise Exception("The unittest2 package is required for Python < 2.7")
+    import unittest
+
+
+AUTH_URL = "http://accounts.example.synnefo.org/astakos/identity/v2.0"
+
+
+def user_info(expires):
+    if isinstance(expires, timedelta):
+        expires = (datetime.now(tzutc()) + expires).isoformat()
+    return {"access": {"token": {"expires": expires,
+                                 "id": "DummyToken",
+                                 "tenant": {"id": "user", "name": "User"}},
+                       "serviceCatalog": [],
+                       "user": {"id": "user", "name": "User"}}}
+
+
+@patch("astakosclient.AstakosClient.authenticate")
+class RetrieveUserTestCase(unittest.TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def retrieve(self, token="DummyToken", url=AUTH_URL, timeout=300):
+        with override_settings(settings, ASTAKOS_AUTH_CACHE_TIMEOUT=timeout):
+            return utils.retrieve_user(token, url)
+
+    def test_cache_hit(self, authenticate):
+        authenticate.return_value = user_info(timedelta(hours=1))
+        self.assertEqual(self.retrieve(), authenticate.return_value)
+        self.assertEqual(self.retrieve(), authenticate.return_value)
+        self.assertEqual(authenticate.call_count, 1)
+
+        # Another token or another Astakos does not hit the cache
+        self.retrieve(token="OtherToken")
+        self.assertEqual(authenticate.call_count, 2)
+        self.retrieve(url="http://accounts.example.org/identity/v2.0")
+        self.assertEqual(authenticate.call_count, 3)
+
+    def test_unicode_token(self, authenticate):
+        authenticate.return_value = user_info(timedelta(hours=1))
+        self.retrieve(token=u"\u03c4\u03bf\u03ba\u03ad\u03bd")
+        self.retrieve(token=u"\u03c4\u03bf\u03ba\u03ad\u03bd")
+        self.assertEqual(authenticate.call_count, 1)
+
+    def test_no_cache(self, authenticate):
+        authenticate.return_value = user_info(timedelta(hours=1))
+        self.retrieve(timeout=0)
+        self.retrieve(timeout=0)
+        self.assertEqual(authenticate.call_count, 2)
+
+    def test_expired_token(self, authenticate):
+        authenticate.return_value = user_info("2013-06-19T15:23:59.975+00:00")
+        self.retrieve()
+        self.retrieve()
+        self.assertEqual(authenticate.call_count, 2)
+
+    def test_unexpected_response(self, authenticate):
+        authenticate.return_value = {"access": {}}
+        self.retrieve()
+        self.retrieve()
+        self.assertEqual(authenticate.call_count, 2)
+
+    def test_timeout_capped_by_expires(self, authenticate):
+        authenticate.return_value = user_info(timedelta(seconds=60))
+        with patch("snf_django.lib.utils.cache.set") as cache_set:
+            self.retrieve(timeout=300)
+        timeout = cache_set.call_args[0][2]
+        self.assertTrue(0 < timeout <= 60)
+
+        authenticate.return_value = user_info(timedelta(hours=1))
+        with patch("snf_django.lib.utils.cache.set") as cache_set:
+            self.retrieve(token="OtherToken", timeout=300)
+        self.assertEqual(cache_set.call_args[0][2], 300)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -13,8 +13,15 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from datetime import datetime
+from hashlib import sha256
+
 from astakosclient import AstakosClient
+from dateutil import parser as date_parser
+from dateutil.tz import tzutc
 from django.conf import settings
+from django.core.cache import cache
+from django.utils.encoding import smart_str
 
 
 def get_token(request):
@@ -52,6 +59,17 @@ def retrieve_user(token, astakos_auth_url, logger=None, client_ip=None):
     if not token:
         return None
 
+    cache_timeout = getattr(settings, "ASTAKOS_AUTH_CACHE_TIMEOUT", 0)
+    if cache_timeout:
+        # Hash the token together with the Astakos URL, so that different
+        # Astakos endpoints sharing a cache backend do not share entries
+        cache_key = "snf_django:token:%s" % \
+            sha256("%s:%s" % (smart_str(astakos_url),
+                              smart_str(token))).hexdigest()
+        user_info = cache.get(cache_key)
+        if user_info is not None:
+            return user_info
+
     headers = None
     if client_ip:
         headers = {'X-Client-IP': client_ip}
@@ -60,4 +78,29 @@ def retrieve_user(token, astakos_auth_url, logger=None, client_ip=None):
                             logger=logger, headers=headers)
     user_info = astakos.authenticate()
 
+    if cache_timeout:
+        timeout = _get_token_cache_timeout(user_info, cache_timeout)
+        if timeout > 0:
+            cache.set(cache_key, user_info, timeout)
+
     return user_info
+
+
+def _get_token_cache_timeout(user_info, max_timeout):
+    """Return for how many seconds the user_info of a token can be cached.
+
+    The timeout never exceeds the time left until the token expires.
+
+    """
+    token = user_info.get("access", {}).get("token")
+    if not isinstance(token, dict):
+        return 0
+    expires = token.get("expires")
+    if not expires:
+        return max_timeout
+    try:
+        expires = date_parser.parse(expires)
+    except (ValueError, TypeError):
+        return 0
+    now = datetime.now(tzutc()) if expires.tzinfo else datetime.now()
+    return min(max_timeout, int((expires - now).total_seconds()))